@@ -1,16 +1,34 @@
-from flask import Flask,render_template
+import asyncio
 from threading import Thread
 
-app = Flask(__name__)
+# Pre-built response: the pinger only cares about the 200.
+_RESPONSE = (
+    b"HTTP/1.1 200 OK\r\n"
+    b"Content-Type: text/plain\r\n"
+    b"Content-Length: 5\r\n"
+    b"Connection: close\r\n"
+    b"\r\n"
+    b"Alive"
+)
 
-#Function returns 'ALive' while running the program
-@app.route('/')
-def index():
-    return "Alive"
 
-def run():
-  app.run(host='0.0.0.0',port=8080)
+async def _handle(reader, writer):
+    try:
+        await reader.read(1024)
+        writer.write(_RESPONSE)
+        await writer.drain()
+    finally:
+        writer.close()
 
-def keep_alive():  
-    t = Thread(target=run)
+
+async def _serve():
+    server = await asyncio.start_server(_handle, host='0.0.0.0', port=8080)
+    async with server:
+        await server.serve_forever()
+
+
+def keep_alive():
+    # One daemon thread running one event loop: no per-request thread
+    # spawns fighting the bot workers for the GIL on every health ping.
+    t = Thread(target=lambda: asyncio.run(_serve()), daemon=True)
     t.start()
@@ -1,40 +1,169 @@
 # app.py — Telegram "prenotazione" bot via webhook (Railway-ready)
 
 from telebot import TeleBot, types
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
 from datetime import datetime as dt, timedelta
+from functools import lru_cache
 from flask import Flask, request, abort
+import atexit
+import queue
+import re
 import sqlite3
 import threading
-import pytz
 import time
 import os
 
 # --- ENV ---
 BOT_TOKEN = os.getenv('TELEGRAM_BOT_TOKEN')
 RAILWAY_URL = os.getenv('RAILWAY_URL')  # es. https://your-app.up.railway.app
+ADMIN_ID = int(os.getenv("ADMIN_ID", "7994205774"))
 if not BOT_TOKEN:
     raise ValueError("❌ TELEGRAM_BOT_TOKEN non è impostato!")
 
 # --- BOT ---
-bot = TeleBot(BOT_TOKEN, parse_mode="Markdown")
-tz = pytz.timezone('Europe/Rome')
+bot = TeleBot(BOT_TOKEN, parse_mode="Markdown", threaded=True, num_threads=16)
+
+# Updates are handled off the webhook thread so Telegram gets its 200
+# right away and never retries (and duplicates) a slow update.
+EXECUTOR = ThreadPoolExecutor(max_workers=8)
 
 # --- DB (persist on Railway volume) ---
 DB_PATH = os.getenv("DB_PATH", "/data/reservation.db")
-local_storage = threading.local()
-available_time_slots = {}
+# A small pool of long-lived connections: the webhook workers are
+# short-lived, so per-thread connections never kept a warm page cache.
+# All writes go through the single db-writer thread; any future read
+# paths can borrow a connection concurrently, which WAL makes safe.
+_POOL_SIZE = 4
+_pool = queue.Queue(maxsize=_POOL_SIZE)
+_pool_init_lock = threading.Lock()
+_pool_ready = False
+
+# The class body below binds `time` as a field annotation, shadowing the
+# module, so the default factory must hold the function itself.
+_monotonic = time.monotonic
+
+
+@dataclass(slots=True)
+class ReservationDraft:
+    """In-progress reservation for one user, filled in step by step."""
+    date: str | None = None
+    time: str | None = None
+    full_name: str | None = None
+    num_people: int | None = None
+    restaurant_link: str | None = None
+    notes: str | None = None
+    step: str | None = None
+    last_seen: float = field(default_factory=_monotonic)
+
+
+# Webhook handlers run on worker threads, so the per-user drafts live in
+# 16 lock-striped shards: the stripe serializes check-then-insert for a
+# given user while leaving other users uncontended.
+_STATE_SHARDS = 16
+_state_locks = [threading.Lock() for _ in range(_STATE_SHARDS)]
+_state_shards = [{} for _ in range(_STATE_SHARDS)]
+
+
+def _shard(user_id):
+    return user_id & (_STATE_SHARDS - 1)
+
+
+def get_draft(user_id):
+    draft = _state_shards[_shard(user_id)].get(user_id)
+    if draft is not None:
+        draft.last_seen = time.monotonic()
+    return draft
+
+
+def start_draft(user_id):
+    i = _shard(user_id)
+    with _state_locks[i]:
+        draft = _state_shards[i].setdefault(user_id, ReservationDraft())
+    draft.last_seen = time.monotonic()
+    return draft
+
+
+def drop_draft(user_id):
+    i = _shard(user_id)
+    with _state_locks[i]:
+        _state_shards[i].pop(user_id, None)
+
+
+# Abandoned drafts would otherwise accumulate forever; a periodic sweep
+# evicts anything untouched for half an hour.
+_DRAFT_TTL = 30 * 60
+_SWEEP_INTERVAL = 60
+
+
+def _sweep_drafts():
+    cutoff = time.monotonic() - _DRAFT_TTL
+    for lock, shard in zip(_state_locks, _state_shards):
+        with lock:
+            stale = [uid for uid, draft in shard.items() if draft.last_seen < cutoff]
+            for uid in stale:
+                del shard[uid]
+    _schedule_sweep()
+
+
+def _schedule_sweep():
+    timer = threading.Timer(_SWEEP_INTERVAL, _sweep_drafts)
+    timer.daemon = True
+    timer.start()
+
+
+_schedule_sweep()
+
+
+def _apply_pragmas(db):
+    # WAL lets readers proceed while a commit is in flight and
+    # synchronous=NORMAL drops the full fsync per commit.
+    db.execute("PRAGMA journal_mode=WAL")
+    db.execute("PRAGMA synchronous=NORMAL")
+    db.execute("PRAGMA busy_timeout=5000")
+    db.execute("PRAGMA temp_store=MEMORY")
+    db.execute("PRAGMA cache_size=-8000")
+
+
+def _ensure_pool():
+    global _pool_ready
+    if not _pool_ready:
+        with _pool_init_lock:
+            if not _pool_ready:
+                os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
+                for i in range(_POOL_SIZE):
+                    db = sqlite3.connect(DB_PATH, check_same_thread=False,
+                                         cached_statements=100)
+                    _apply_pragmas(db)
+                    if i == 0:
+                        create_reservations_table(db)
+                    _pool.put(db)
+                _pool_ready = True
+
+
+@contextmanager
+def borrow_conn():
+    _ensure_pool()
+    conn = _pool.get()
+    try:
+        yield conn
+    finally:
+        _pool.put(conn)
 
 
-def get_db_connection():
-    if not hasattr(local_storage, 'db'):
-        os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
-        local_storage.db = sqlite3.connect(DB_PATH, check_same_thread=False)
-        create_reservations_table()
-    return local_storage.db
+def _close_pool():
+    while not _pool.empty():
+        try:
+            _pool.get_nowait().close()
+        except queue.Empty:
+            break
 
 
-def create_reservations_table():
-    db_connection = get_db_connection()
+atexit.register(_close_pool)
+
+
+def create_reservations_table(db_connection):
     cursor = db_connection.cursor()
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS reservations (
@@ -48,44 +177,87 @@ def create_reservations_table():
             notes TEXT
         )
     ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_reservations_user_date
+        ON reservations(user_id, date)
+    ''')
     db_connection.commit()
 
 
-def save_reservation_to_db(user_id, full_name, num_people, reservation_datetime,
+_INSERT_SQL = """
+    INSERT INTO reservations (user_id, full_name, num_people, date, reservation_time, restaurant_link, notes)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+
+# Reservations are enqueued and flushed by a single writer thread, which
+# groups rows that arrive close together into one transaction so the
+# per-commit WAL fsync is amortized across the batch.
+_write_queue = queue.Queue()
+
+
+def _db_writer_loop():
+    while True:
+        rows = [_write_queue.get()]
+        try:
+            while len(rows) < 64:
+                rows.append(_write_queue.get(timeout=0.2))
+        except queue.Empty:
+            pass
+        # The loop must survive any sqlite3 error: if this thread dies the
+        # queue is never drained again and reservations are lost silently.
+        try:
+            with borrow_conn() as db, db:
+                # `with db:` wraps the batch in one explicit transaction —
+                # a single WAL commit, rolled back as a unit on error.
+                db.executemany(_INSERT_SQL, rows)
+        except Exception as exc:
+            print(f"⚠️ DB writer: batch di {len(rows)} insert fallito ({exc}); riprovo riga per riga")
+            for row in rows:
+                try:
+                    with borrow_conn() as db, db:
+                        db.execute(_INSERT_SQL, row)
+                except Exception as row_exc:
+                    print(f"⚠️ DB writer: riga scartata {row!r} ({row_exc})")
+
+
+threading.Thread(target=_db_writer_loop, name="db-writer", daemon=True).start()
+
+
+def save_reservation_to_db(user_id, full_name, num_people, date_str, time_str,
                            restaurant_link=None, notes=None):
-    cursor = get_db_connection().cursor()
-    cursor.execute(
-        """
-        INSERT INTO reservations (user_id, full_name, num_people, date, reservation_time, restaurant_link, notes)
-        VALUES (?, ?, ?, ?, ?, ?, ?)
-        """,
-        (user_id, full_name, num_people,
-         reservation_datetime.date().strftime('%Y-%m-%d'),
-         reservation_datetime.strftime('%H:%M'),
+    _write_queue.put(
+        (user_id, full_name, num_people, date_str, time_str,
          restaurant_link, notes)
     )
-    get_db_connection().commit()
 
 
 # ---- BUTTON GENERATORS ----
+# Quarter-hour slot labels between 09:00 and 22:45, formatted once at import.
+TIME_SLOTS = tuple(f"{h:02d}:{m:02d}" for h in range(9, 23) for m in (0, 15, 30, 45))
+
+# Buttons with fixed labels are shared across markups; telebot only reads
+# them when serializing a send, so one instance each is enough.
+BTN_RESERVE = types.InlineKeyboardButton("🍴 Prenota", callback_data="reserve")
+BTN_SUPPORT = types.InlineKeyboardButton("💬 Supporto", url="https://t.me/GoldenForkBookingsBot")
+BTN_NUM = [types.InlineKeyboardButton(str(i), callback_data=f"num_{i}") for i in range(1, 6)]
+BTN_NUM_OTHER = types.InlineKeyboardButton("Altro", callback_data="num_other")
+
+
 def generate_main_buttons():
     markup = types.InlineKeyboardMarkup(row_width=2)
-    markup.add(
-        types.InlineKeyboardButton("🍴 Prenota", callback_data="reserve"),
-        types.InlineKeyboardButton("💬 Supporto", url="https://t.me/GoldenForkBookingsBot")
-    )
+    markup.add(BTN_RESERVE, BTN_SUPPORT)
     return markup
 
 
-def generate_date_selection_buttons():
+@lru_cache(maxsize=2)
+def generate_date_selection_buttons(today):
     markup = types.InlineKeyboardMarkup()
-    now = dt.now()
     for i in range(7):
-        date = now + timedelta(days=i)
+        date = today + timedelta(days=i)
         markup.add(
             types.InlineKeyboardButton(
                 date.strftime('%d %b'),
-                callback_data=date.strftime('%Y-%m-%d')
+                callback_data=date.strftime('date_%Y-%m-%d')
             )
         )
     return markup
@@ -93,27 +265,29 @@ def generate_date_selection_buttons():
 
 def generate_half_hour_slots():
     markup = types.InlineKeyboardMarkup(row_width=4)
-    buttons = []
-    for hour in range(9, 23):
-        for minute in [0, 15, 30, 45]:
-            time_str = f"{hour:02d}:{minute:02d}"
-            buttons.append(
-                types.InlineKeyboardButton(time_str, callback_data=f"time_{time_str}")
-            )
-    markup.add(*buttons)
+    buttons = [
+        types.InlineKeyboardButton(time_str, callback_data=f"time_{time_str}")
+        for time_str in TIME_SLOTS
+    ]
+    # Assign the rows directly instead of markup.add(*buttons), skipping
+    # telebot's per-call row splitter for the 56 buttons.
+    markup.keyboard = [buttons[i:i + 4] for i in range(0, len(buttons), 4)]
     return markup
 
 
 def generate_num_people_buttons():
     markup = types.InlineKeyboardMarkup(row_width=3)
-    buttons = []
-    for i in range(1, 6):
-        buttons.append(types.InlineKeyboardButton(str(i), callback_data=f"num_{i}"))
-    buttons.append(types.InlineKeyboardButton("Altro", callback_data="num_other"))
-    markup.add(*buttons)
+    markup.add(*BTN_NUM, BTN_NUM_OTHER)
     return markup
 
 
+# Static keyboards never change: build them once at import instead of on
+# every callback.
+MAIN_BUTTONS_MARKUP = generate_main_buttons()
+HALF_HOUR_SLOTS_MARKUP = generate_half_hour_slots()
+NUM_PEOPLE_MARKUP = generate_num_people_buttons()
+
+
 @bot.message_handler(commands=['panel'])
 def send_panel(message):
     markup = types.InlineKeyboardMarkup()
@@ -137,97 +311,123 @@ def send_panel(message):
 def send_welcome(message):
     user_id = message.from_user.id
 
-    if user_id in available_time_slots:
-        del available_time_slots[user_id]
+    drop_draft(user_id)
     bot.clear_step_handler_by_chat_id(message.chat.id)
 
     bot.send_message(
         message.chat.id,
-        "✨ Prenotazione Golden Fork ✨\nPrenota senza sforzi e risparmia subito 50€.",
-        reply_markup=generate_main_buttons()
+        WELCOME_MESSAGE,
+        reply_markup=MAIN_BUTTONS_MARKUP
     )
 
 
 # ---- CALLBACK HANDLER ----
-@bot.callback_query_handler(func=lambda call: True)
-def callback_handler(call):
-    chat_id = call.message.chat.id
-    user_id = call.from_user.id
-    data = call.data
+def _on_reserve(user_id, chat_id, payload, call):
+    start_draft(user_id)
+    bot.send_message(
+        chat_id,
+        "📅 Seleziona la data della tua prenotazione:",
+        reply_markup=generate_date_selection_buttons(dt.now().date())
+    )
 
-    if data == "reserve":
-        if user_id not in available_time_slots:
-            available_time_slots[user_id] = {}
-        bot.send_message(
-            chat_id,
-            "📅 Seleziona la data della tua prenotazione:",
-            reply_markup=generate_date_selection_buttons()
-        )
+
+def _on_date(user_id, chat_id, payload, call):
+    draft = get_draft(user_id)
+    if draft is None:
         return
+    draft.date = payload
+    bot.send_message(
+        chat_id,
+        f"⏰ Seleziona un orario per il {payload}:",
+        reply_markup=HALF_HOUR_SLOTS_MARKUP
+    )
 
-    if "-" in data and len(data) == 10:
-        available_time_slots[user_id]['date'] = data
-        bot.send_message(
-            chat_id,
-            f"⏰ Seleziona un orario per il {data}:",
-            reply_markup=generate_half_hour_slots()
-        )
+
+def _on_time(user_id, chat_id, payload, call):
+    draft = get_draft(user_id)
+    if draft is None:
         return
+    draft.time = payload
+    bot.send_message(
+        chat_id,
+        "Per favore, inserisci il nome completo per la prenotazione (nome e cognome):"
+    )
+    draft.step = 'full_name'
+    bot.register_next_step_handler(call.message, process_full_name)
 
-    if data.startswith("time_"):
-        selected_time = data.replace("time_", "")
-        available_time_slots[user_id]['time'] = selected_time
-        bot.send_message(
-            chat_id,
-            "Per favore, inserisci il nome completo per la prenotazione (nome e cognome):"
-        )
-        available_time_slots[user_id]['step'] = 'full_name'
-        bot.register_next_step_handler(call.message, process_full_name)
+
+def _on_num(user_id, chat_id, payload, call):
+    draft = get_draft(user_id)
+    if draft is None:
         return
+    if payload == "other":
+        draft.step = 'num_people'
+        bot.send_message(chat_id, "Inserisci il numero di persone:")
+        bot.register_next_step_handler(call.message, process_num_people)
+    else:
+        draft.num_people = int(payload)
+        draft.step = 'restaurant_link'
+        bot.send_message(chat_id, "Incolla il link del ristorante:")
+        bot.register_next_step_handler(call.message, process_restaurant_link)
+
+
+# Matches the bare ISO dates used as callback data by pre-"date_" keyboards.
+_IS_DATE = re.compile(r"^\d{4}-\d{2}-\d{2}$").match
 
-    if data.startswith("num_"):
-        choice = data.replace("num_", "")
-        if choice == "other":
-            available_time_slots[user_id]['step'] = 'num_people'
-            bot.send_message(chat_id, "Inserisci il numero di persone:")
-            bot.register_next_step_handler(call.message, process_num_people)
+CALLBACK_DISPATCH = {
+    "reserve": _on_reserve,
+    "date": _on_date,
+    "time": _on_time,
+    "num": _on_num,
+}
+
+
+@bot.callback_query_handler(func=lambda call: True)
+def callback_handler(call):
+    data = call.data
+    prefix, _, payload = data.partition("_")
+    handler = CALLBACK_DISPATCH.get(prefix)
+    if handler is None:
+        # Date keyboards sent before the "date_" prefix carried a bare
+        # ISO date; keep routing those until they age out.
+        if _IS_DATE(data):
+            handler, payload = _on_date, data
         else:
-            available_time_slots[user_id]['num_people'] = int(choice)
-            available_time_slots[user_id]['step'] = 'restaurant_link'
-            bot.send_message(chat_id, "Incolla il link del ristorante:")
-            bot.register_next_step_handler(call.message, process_restaurant_link)
-        return
+            return
+    handler(call.from_user.id, call.message.chat.id, payload, call)
 
 
 # ---- STEP HANDLERS ----
 def process_full_name(message):
     user_id = message.from_user.id
 
-    if user_id not in available_time_slots:
+    draft = get_draft(user_id)
+    if draft is None:
         bot.send_message(message.chat.id, "⚠️ Qualcosa è andato storto. Riavvia con /start.")
         return
 
-    available_time_slots[user_id]['full_name'] = message.text.strip()
-    available_time_slots[user_id]['step'] = 'num_people'
+    draft.full_name = message.text.strip()
+    draft.step = 'num_people'
 
-    bot.send_message(message.chat.id, "Quante persone parteciperanno?", reply_markup=generate_num_people_buttons())
+    bot.send_message(message.chat.id, "Quante persone parteciperanno?", reply_markup=NUM_PEOPLE_MARKUP)
 
 
 def process_num_people(message):
     user_id = message.from_user.id
 
-    if user_id not in available_time_slots:
+    draft = get_draft(user_id)
+    if draft is None:
         bot.send_message(message.chat.id, "⚠️ Qualcosa è andato storto. Riavvia con /start.")
         return
 
     try:
-        available_time_slots[user_id]['num_people'] = int(message.text.strip())
+        draft.num_people = int(message.text.strip())
     except ValueError:
         bot.send_message(message.chat.id, "Inserisci un numero valido.")
         bot.register_next_step_handler(message, process_num_people)
         return
 
-    available_time_slots[user_id]['step'] = 'restaurant_link'
+    draft.step = 'restaurant_link'
     bot.send_message(message.chat.id, "Incolla il link del ristorante:")
     bot.register_next_step_handler(message, process_restaurant_link)
 
@@ -235,86 +435,115 @@ def process_num_people(message):
 def process_restaurant_link(message):
     user_id = message.from_user.id
 
-    if user_id not in available_time_slots:
+    draft = get_draft(user_id)
+    if draft is None:
         bot.send_message(message.chat.id, "⚠️ Qualcosa è andato storto. Riavvia con /start.")
         return
 
-    available_time_slots[user_id]['restaurant_link'] = message.text.strip()
-    available_time_slots[user_id]['step'] = 'notes'
+    draft.restaurant_link = message.text.strip()
+    draft.step = 'notes'
 
     bot.send_message(message.chat.id, "Note aggiuntive? (es. allergie, richieste speciali)")
     bot.register_next_step_handler(message, process_notes)
 
 
+# Message templates are parsed once at import; the handlers fill them with
+# a single format_map call instead of walking multi-part f-strings.
+_CONF_TMPL = (
+    "🌟 Prenotazione confermata!\n\n"
+    "📅 Data: {date}\n"
+    "⏰ Ora: {time}\n"
+    "🙍 Nome: {full_name}\n"
+    "👫 Persone: {num_people}\n"
+    "📍 Ristorante: {restaurant_link}\n"
+    "📝 Note: {notes}\n\n"
+    "Il nostro team ti contatterà a breve per completare il pagamento. Grazie per aver scelto Golden Fork!"
+)
+
+_ADMIN_TMPL = (
+    "📅 Date: {date}\n"
+    "⏰ Time: {time}\n"
+    "🙍 Name: {full_name}\n"
+    "👫 People: {num_people}\n"
+    "📍 Restaurant: {restaurant_link}\n"
+    "📝 Notes: {notes}\n\n"
+    "👤 Telegram: {tg_name} ({tg_username})"
+)
+
+WELCOME_MESSAGE = "✨ Prenotazione Golden Fork ✨\nPrenota senza sforzi e risparmia subito 50€."
+
+MESSAGE_TO_CUSTOMER = (
+    "Grazie per aver scelto Golden Fork! 🍽️\n\n"
+    "💳 Dopo aver completato il pagamento, ti contatteremo privatamente con la conferma della prenotazione, "
+    "compreso il ristorante e l’orario selezionato.\n\n"
+    "📍 Al ristorante, comunica semplicemente che hai prenotato tramite TheFork. "
+    "Il ristorante applicherà automaticamente lo sconto.\n\n"
+    "💸 Il risparmio sarà applicato al conto finale. Buon appetito!"
+)
+
+
+def _send_followups(chat_id, message_to_customer):
+    # The 2s pacing between messages is cosmetic; timers keep it without
+    # parking an executor worker in time.sleep for 4 seconds.
+    timer = threading.Timer(2.0, bot.send_message, args=(chat_id, message_to_customer))
+    timer.daemon = True
+    timer.start()
+    timer = threading.Timer(
+        4.0, bot.send_message,
+        args=(chat_id, WELCOME_MESSAGE),
+        kwargs={"reply_markup": MAIN_BUTTONS_MARKUP}
+    )
+    timer.daemon = True
+    timer.start()
+
+
 def process_notes(message):
     user_id = message.from_user.id
 
-    if user_id not in available_time_slots:
+    data = get_draft(user_id)
+    if data is None:
         bot.send_message(message.chat.id, "⚠️ Qualcosa è andato storto. Riavvia con /start.")
         return
 
-    data = available_time_slots[user_id]
-    data['notes'] = message.text.strip()
-
-    reservation_datetime = dt.strptime(f"{data['date']} {data['time']}", "%Y-%m-%d %H:%M")
+    data.notes = message.text.strip()
 
+    # data.date and data.time come from the buttons already in the stored
+    # YYYY-MM-DD / HH:MM formats, so no strptime round trip is needed.
     save_reservation_to_db(
         user_id,
-        data['full_name'],
-        data['num_people'],
-        reservation_datetime,
-        restaurant_link=data.get('restaurant_link'),
-        notes=data.get('notes')
+        data.full_name,
+        data.num_people,
+        data.date,
+        data.time,
+        restaurant_link=data.restaurant_link,
+        notes=data.notes
     )
 
     full_name_telegram = f"{message.from_user.first_name} {message.from_user.last_name or ''}".strip()
     telegram_username = f"@{message.from_user.username}" if message.from_user.username else "Nessun username"
 
-    confirmation_msg = (
-        f"🌟 Prenotazione confermata!\n\n"
-        f"📅 Data: {data['date']}\n"
-        f"⏰ Ora: {data['time']}\n"
-        f"🙍 Nome: {data['full_name']}\n"
-        f"👫 Persone: {data['num_people']}\n"
-        f"📍 Ristorante: {data.get('restaurant_link','Nessun link')}\n"
-        f"📝 Note: {data.get('notes','')}\n\n"
-        f"Il nostro team ti contatterà a breve per completare il pagamento. Grazie per aver scelto Golden Fork!"
-    )
-
-    message_to_customer = (
-        f"Grazie per aver scelto Golden Fork! 🍽️\n\n"
-        f"💳 Dopo aver completato il pagamento, ti contatteremo privatamente con la conferma della prenotazione, "
-        f"compreso il ristorante e l’orario selezionato.\n\n"
-        f"📍 Al ristorante, comunica semplicemente che hai prenotato tramite TheFork. "
-        f"Il ristorante applicherà automaticamente lo sconto.\n\n"
-        f"💸 Il risparmio sarà applicato al conto finale. Buon appetito!"
-    )
+    fields = {
+        'date': data.date,
+        'time': data.time,
+        'full_name': data.full_name,
+        'num_people': data.num_people,
+        'restaurant_link': data.restaurant_link or 'Nessun link',
+        'notes': data.notes or '',
+    }
+    confirmation_msg = _CONF_TMPL.format_map(fields)
 
     # 🇬🇧 Admin message (remains in English)
-    confirmation_msg_admin = (
-        f"📅 Date: {data['date']}\n"
-        f"⏰ Time: {data['time']}\n"
-        f"🙍 Name: {data['full_name']}\n"
-        f"👫 People: {data['num_people']}\n"
-        f"📍 Restaurant: {data.get('restaurant_link','No link')}\n"
-        f"📝 Notes: {data.get('notes','')}\n\n"
-        f"👤 Telegram: {full_name_telegram} ({telegram_username})"
-    )
+    fields['restaurant_link'] = data.restaurant_link or 'No link'
+    fields['tg_name'] = full_name_telegram
+    fields['tg_username'] = telegram_username
+    confirmation_msg_admin = _ADMIN_TMPL.format_map(fields)
 
     bot.send_message(message.chat.id, confirmation_msg)
-    time.sleep(2)
-    bot.send_message(message.chat.id, message_to_customer)
-    time.sleep(2)
-    bot.send_message(
-        message.chat.id,
-        "✨ Prenotazione Golden Fork ✨\nPrenota senza sforzi e risparmia subito 50€.",
-        reply_markup=generate_main_buttons()
-    )
 
-    ADMIN_ID = 7994205774
-    bot.send_message(ADMIN_ID, f"📩 Nuova prenotazione:\n\n{confirmation_msg_admin}")
+    _send_followups(message.chat.id, MESSAGE_TO_CUSTOMER)
+    EXECUTOR.submit(bot.send_message, ADMIN_ID, f"📩 Nuova prenotazione:\n\n{confirmation_msg_admin}")
 
-    del available_time_slots[user_id]
+    drop_draft(user_id)
 
 
 # --- FLASK (Webhook) ---
@@ -327,13 +556,18 @@ def health():
 @app.post(f"/webhook/{BOT_TOKEN}")
 def telegram_webhook():
     if request.headers.get("content-type") == "application/json":
-        update = types.Update.de_json(request.get_data(as_text=True))
-        bot.process_new_updates([update])
+        # de_json accepts the parsed dict directly, so let Flask parse the
+        # body once instead of decoding to str and parsing again in telebot.
+        update = types.Update.de_json(request.get_json(cache=False))
+        EXECUTOR.submit(bot.process_new_updates, [update])
         return "OK", 200
     abort(403)
 
 
-if __name__ == "__main__":
+def setup_webhook():
+    # Called explicitly (set_webhook.py in production, the DEV block below
+    # locally) — never as an import side effect, so importing this module
+    # can't race remove_webhook/set_webhook or drop pending updates.
     if not RAILWAY_URL:
         raise ValueError("❌ RAILWAY_URL non impostato! (es. https://your-app.up.railway.app)")
 
@@ -344,6 +578,10 @@ if __name__ == "__main__":
         allowed_updates=["message", "callback_query"]
     )
 
+
+if __name__ == "__main__" and os.getenv("DEV"):
+    setup_webhook()
+
     port = int(os.getenv("PORT", "8080"))
     print(f"🤖 Bot di prenotazione attivo via webhook sulla porta {port}…")
     app.run(host="0.0.0.0", port=port)
@@ -0,0 +1,7 @@
+# One-shot webhook registration, run once per deploy before gunicorn
+# starts (see Procfile).
+
+from main import setup_webhook
+
+if __name__ == "__main__":
+    setup_webhook()